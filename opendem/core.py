@@ -1,33 +1,94 @@
 import numpy as np
 import os
 import yaml
-import signal
 import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from xml.sax.saxutils import escape
 from osgeo import gdal, ogr, osr
 
 # Standard GIS exception handling
 gdal.UseExceptions()
 
+def _threshold_mask(data, mask_cfg, nodata_val):
+    """
+    Returns a uint8 0/1 mask of pixels within the configured min/max thresholds.
+    Comparisons write into one reusable boolean buffer and the result is viewed
+    (not copied) as uint8.
+    """
+    condition = np.not_equal(data, nodata_val)
+    scratch = np.empty(data.shape, dtype=bool)
+    if 'min' in mask_cfg:
+        condition &= np.greater_equal(data, mask_cfg['min'], out=scratch)
+    if 'max' in mask_cfg:
+        condition &= np.less_equal(data, mask_cfg['max'], out=scratch)
+    return condition.view(np.uint8)
+
+def _threshold_pixel_function(in_ar, out_ar, xoff, yoff, xsize, ysize, raster_xsize,
+                              raster_ysize, buf_radius, gt, **kwargs):
+    """VRT pixel function: thresholds the source block into out_ar via _threshold_mask."""
+    mask_cfg = {key: float(kwargs[key]) for key in ('min', 'max') if key in kwargs}
+    out_ar[:] = _threshold_mask(in_ar[0], mask_cfg, float(kwargs['nodata']))
+    if len(in_ar) > 1:
+        # Optional second source is the rasterized clipping cutline
+        out_ar[in_ar[1] == 0] = 0
+
+def _clip_pixel_function(in_ar, out_ar, xoff, yoff, xsize, ysize, raster_xsize,
+                         raster_ysize, buf_radius, gt, **kwargs):
+    """VRT pixel function: copies the source block, setting nodata outside the rasterized cutline."""
+    out_ar[:] = in_ar[0]
+    out_ar[in_ar[1] == 0] = float(kwargs['nodata'])
+
 class OpenDEM:
+    # Tile size for GeoTIFFs we create and the minimum window for block-wise passes
+    BLOCK_SIZE = 512
+
     def __init__(self, config_path):
-        # Register Ctrl+C handler
-        signal.signal(signal.SIGINT, self._handle_interrupt)
-        
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
         
         self.cache_dir = self.config.get('cache_dir', './cache')
         os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Keep intermediate rasters in /vsimem/ (RAM) if the config says so or, by default,
+        # if they are estimated to fit alongside the GDAL block cache
+        self.intermediates_in_memory = self.config.get('intermediates_in_memory')
+        if self.intermediates_in_memory is None:
+            self.intermediates_in_memory = self._intermediates_fit_in_memory()
+        self._intermediates = []
+        # Last percentage seen by progress_callback
+        self._last_gdal_p = -1
+        # Extra diagnostics that cost additional raster passes
+        self.verbose = self.config.get('verbose', False)
+        # Size/georeferencing of the raster being exported, set once by _execute_process
+        self._geo_meta = None
         
         gdal.SetConfigOption('GDAL_HTTP_CACHE', 'YES')
         gdal.SetConfigOption('GDAL_HTTP_CACHE_DIRECTORY', self.cache_dir)
+
+        # Larger block/VSI caches so overlapping tile reads are decoded once per warp
+        gdal.SetConfigOption('GDAL_CACHEMAX', '50%')
+        gdal.SetConfigOption('VSI_CACHE', 'TRUE')
+        gdal.SetConfigOption('VSI_CACHE_SIZE', '1000000000')
+        gdal.SetConfigOption('CPL_VSIL_CURL_CACHE_SIZE', '500000000')
+        gdal.SetConfigOption('GDAL_HTTP_MERGE_CONSECUTIVE_RANGES', 'YES')
+        gdal.SetConfigOption('GDAL_HTTP_MULTIRANGE', 'YES')
+
+        # Multiplex tile requests over HTTP/2 and retry transient failures in GDAL itself
+        gdal.SetConfigOption('GDAL_HTTP_VERSION', '2TLS')
+        gdal.SetConfigOption('GDAL_HTTP_MAX_RETRY', '3')
+        gdal.SetConfigOption('GDAL_HTTP_RETRY_DELAY', '1')
+        # Skip directory listings / sidecar probes on remote files
+        gdal.SetConfigOption('GDAL_DISABLE_READDIR_ON_OPEN', 'EMPTY_DIR')
+
+        # Allow VRTs to call this module's pixel functions (and nothing else)
+        gdal.SetConfigOption('GDAL_VRT_PYTHON_TRUSTED_MODULES', __name__)
+
+        # Let GDAL use every core for warping and GTiff compression
+        gdal.SetConfigOption('GDAL_NUM_THREADS', 'ALL_CPUS')
         
         self.log(f"Initialized opendem with config: {config_path}")
 
-    def _handle_interrupt(self, sig, frame):
-        self.log("Intercepted ctrl+C. Forcing exit...")
-        os._exit(0)
-
     def log(self, message):
         """
         Easily overridable logging function. 
@@ -41,6 +102,45 @@ class OpenDEM:
             return f"/vsicurl/{path}"
         return path
 
+    def _intermediates_fit_in_memory(self):
+        """
+        Estimates the uncompressed size of the intermediate rasters for the configured
+        bounds/resolution and checks it against a quarter of usable RAM (GDAL_CACHEMAX
+        already claims half).
+        """
+        src_srs = osr.SpatialReference()
+        src_srs.ImportFromEPSG(4326)
+        src_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        dst_srs = osr.SpatialReference()
+        dst_srs.ImportFromEPSG(3857)
+        transform = osr.CoordinateTransformation(src_srs, dst_srs)
+        min_x, min_y, max_x, max_y = transform.TransformBounds(*self.config['bounds'], 21)
+
+        resolution = self.config['resolution']
+        pixels = ((max_x - min_x) / resolution) * ((max_y - min_y) / resolution)
+        # RGB (3 bytes) + Float32 product (4 bytes) + Byte clip/threshold mask (1 byte)
+        estimated_bytes = pixels * 8
+        fits = estimated_bytes <= gdal.GetUsablePhysicalRAM() / 4
+        self.log(f"Estimated intermediates: {estimated_bytes / 1e9:.1f} GB, "
+                 f"keeping them {'in memory' if fits else 'in cache_dir'}")
+        return fits
+
+    def _intermediate_path(self, name):
+        """Returns the path for an intermediate file, in /vsimem/ or cache_dir as configured."""
+        if self.intermediates_in_memory:
+            path = f"/vsimem/opendem/{name}"
+        else:
+            path = os.path.join(self.cache_dir, name)
+        self._intermediates.append(path)
+        return path
+
+    def _cleanup_intermediates(self):
+        """Frees in-memory intermediates. On-disk ones are left in cache_dir as before."""
+        for path in self._intermediates:
+            if path.startswith('/vsimem/') and gdal.VSIStatL(path) is not None:
+                gdal.Unlink(path)
+        self._intermediates = []
+
     def _generate_vrt(self):
         vrt_path = os.path.join(self.cache_dir, "source.vrt")
         absolute_cache_path = os.path.abspath(self.cache_dir)
@@ -70,23 +170,44 @@ class OpenDEM:
 
     def progress_callback(self, complete, message, unknown):
         percent = int(complete * 100)
-        
-        # Initialize the attribute on the instance (self) if it doesn't exist
-        if not hasattr(self, '_last_gdal_p'):
-            self._last_gdal_p = -1
-            
-        # Only log when the percentage actually increments
-        if percent > self._last_gdal_p:
-            self._last_gdal_p = percent
-            # Log every 5% to keep the UI snappy and avoid database bloat
-            if percent % 5 == 0:
-                self.log(f"[opendem] Warp Progress: {percent}%")
+
+        # Most GDAL ticks don't move the integer percentage: bail out early
+        if percent == self._last_gdal_p:
+            return 1
+
+        # Compare with != (not >) so a new operation restarting at 0% logs again
+        self._last_gdal_p = percent
+        # Log every 5% to keep the UI snappy and avoid database bloat
+        if percent % 5 == 0:
+            self.log(f"Warp Progress: {percent}%")
                 
         return 1
 
     def run(self):
+        try:
+            self._run_pipeline()
+        except KeyboardInterrupt as e:
+            self.log("Intercepted ctrl+C. Stopping...")
+            # Drop the failed frames' locals so their GDAL handles (and worker reads) are
+            # released before the intermediates they point at are touched
+            traceback.clear_frames(e.__traceback__)
+            # Rename rather than delete interrupted on-disk intermediates so a half-written
+            # file is never mistaken for a complete one; the HTTP tile cache is left untouched
+            for path in self._intermediates:
+                if not path.startswith('/vsimem/') and os.path.exists(path):
+                    os.replace(path, path + ".partial")
+            self._cleanup_intermediates()
+            self.log("Interrupted. Partial intermediates discarded.")
+            sys.exit(130)
+        except BaseException as e:
+            traceback.clear_frames(e.__traceback__)
+            self._cleanup_intermediates()
+            raise
+        self._cleanup_intermediates()
+
+    def _run_pipeline(self):
         vrt_path = self._generate_vrt()
-        temp_rgb = os.path.join(self.cache_dir, "temp_rgb.tif")
+        temp_rgb = self._intermediate_path("temp_rgb.tif")
         
         max_retries = 5
         attempt = 0
@@ -96,7 +217,7 @@ class OpenDEM:
             try:
                 self.log(f"Warp Attempt {attempt + 1}/{max_retries}...")
                 
-                gdal.Warp(
+                ds = gdal.Warp(
                     temp_rgb,
                     vrt_path,
                     outputBounds=self.config['bounds'],
@@ -104,6 +225,11 @@ class OpenDEM:
                     xRes=self.config['resolution'],
                     yRes=self.config['resolution'],
                     dstSRS="EPSG:3857",
+                    multithread=True,
+                    warpOptions=['NUM_THREADS=ALL_CPUS'],
+                    creationOptions=['NUM_THREADS=ALL_CPUS', 'TILED=YES',
+                                     f'BLOCKXSIZE={self.BLOCK_SIZE}', f'BLOCKYSIZE={self.BLOCK_SIZE}',
+                                     'COMPRESS=DEFLATE', 'PREDICTOR=2'],
                     callback=self.progress_callback
                 )
                 success = True
@@ -123,47 +249,330 @@ class OpenDEM:
 
         # 2. DECODE
         self.log("Decoding RGB bands into metric elevation data...")
-        ds = gdal.Open(temp_rgb)
-        r = ds.GetRasterBand(1).ReadAsArray().astype(float)
-        g = ds.GetRasterBand(2).ReadAsArray().astype(float)
-        b = ds.GetRasterBand(3).ReadAsArray().astype(float)
-        
-        elevation = (r * 256.0 + g + b / 256.0) - 32768.0
-        self.log(f"Elevation stats: Min {np.min(elevation):.2f}m, Max {np.max(elevation):.2f}m")
+        # Reuse the dataset returned by Warp rather than reopening temp_rgb
+        ds.FlushCache()
+        base_dem = self._generate_elevation_vrt(ds, temp_rgb)
 
-        base_dem = os.path.join(self.cache_dir, "base_elevation.tif")
-        self._save_raster(elevation, ds, base_dem)
+        elev_ds = gdal.Open(base_dem)
+        if self.verbose:
+            # Full scan of the decoded raster (min and max in one pass) - diagnostics only
+            elev_min, elev_max = elev_ds.GetRasterBand(1).ComputeRasterMinMax(False)
+            self.log(f"Elevation stats: Min {elev_min:.2f}m, Max {elev_max:.2f}m")
         
         # 3. PROCESS & CLIP
-        self._execute_process(base_dem)
+        self._execute_process(elev_ds)
+        elev_ds = None
         ds = None
 
-    def _save_raster(self, data, source_ds, path, nodata=None):
+    def _generate_elevation_vrt(self, rgb_ds, rgb_path):
+        """
+        Writes a VRT that decodes Terrarium RGB on the fly: r * 256 + g + b / 256 - 32768.
+        Each band is a scaled ComplexSource summed by GDAL's native 'sum' pixel function,
+        so DEMProcessing streams elevation without an intermediate float raster on disk.
+        """
+        vrt_path = self._intermediate_path("base_elevation.vrt")
+        source_path = self._absolute_path(rgb_path)
+        geotransform = ", ".join(repr(v) for v in rgb_ds.GetGeoTransform())
+
+        # (band, ScaleRatio, ScaleOffset) - the -32768 offset is folded into the red band
+        terms = [(1, 256.0, -32768.0), (2, 1.0, 0.0), (3, 1.0 / 256.0, 0.0)]
+        sources = "".join(f"""
+        <ComplexSource>
+            <SourceFilename relativeToVRT="0">{source_path}</SourceFilename>
+            <SourceBand>{band}</SourceBand>
+            <ScaleOffset>{offset}</ScaleOffset>
+            <ScaleRatio>{ratio}</ScaleRatio>
+        </ComplexSource>""" for band, ratio, offset in terms)
+
+        vrt_content = f"""<VRTDataset rasterXSize="{rgb_ds.RasterXSize}" rasterYSize="{rgb_ds.RasterYSize}">
+    <SRS>{escape(rgb_ds.GetProjection())}</SRS>
+    <GeoTransform>{geotransform}</GeoTransform>
+    <VRTRasterBand dataType="Float32" band="1" subClass="VRTDerivedRasterBand">
+        <PixelFunctionType>sum</PixelFunctionType>
+        <SourceTransferType>Float32</SourceTransferType>{sources}
+    </VRTRasterBand>
+</VRTDataset>"""
+        self._write_vrt(vrt_path, vrt_content)
+        return vrt_path
+
+    def _generate_derived_vrt(self, name, source_paths, data_type, pixel_function, arguments, nodata):
+        """
+        Writes a single-band VRT computed per block, as it is read, by one of this module's
+        Python pixel functions. Each of source_paths (band 1) becomes one entry of in_ar.
+        """
+        vrt_path = self._intermediate_path(name)
+        meta = self._geo_meta
+        geotransform = ", ".join(repr(v) for v in meta['geotransform'])
+        attributes = " ".join(f'{key}="{value!r}"' for key, value in arguments.items())
+        sources = "".join(f"""
+        <SimpleSource>
+            <SourceFilename relativeToVRT="0">{self._absolute_path(path)}</SourceFilename>
+            <SourceBand>1</SourceBand>
+        </SimpleSource>""" for path in source_paths)
+
+        vrt_content = f"""<VRTDataset rasterXSize="{meta['xsize']}" rasterYSize="{meta['ysize']}">
+    <SRS>{escape(meta['projection'])}</SRS>
+    <GeoTransform>{geotransform}</GeoTransform>
+    <VRTRasterBand dataType="{data_type}" band="1" subClass="VRTDerivedRasterBand">
+        <NoDataValue>{nodata}</NoDataValue>
+        <PixelFunctionLanguage>Python</PixelFunctionLanguage>
+        <PixelFunctionType>{__name__}.{pixel_function}</PixelFunctionType>
+        <PixelFunctionArguments {attributes}/>
+        <SourceTransferType>Float32</SourceTransferType>{sources}
+    </VRTRasterBand>
+</VRTDataset>"""
+        self._write_vrt(vrt_path, vrt_content)
+        return vrt_path
+
+    def _rasterize_cutline(self, proc_ds, clipping_path):
+        """
+        Crops proc_ds to the cutline's extent and rasterizes the cutline once into a Byte mask
+        on that grid. Returns (cropped_ds, cropped_path, clip_mask_path); the mask is applied
+        per block by the export VRT instead of running a cutline warp over the whole raster.
+        """
+        cutline_ds = ogr.Open(clipping_path)
+        layer = cutline_ds.GetLayer(0)
+
+        # Cutline extent in the raster's SRS
+        raster_srs = osr.SpatialReference(wkt=proc_ds.GetProjection())
+        raster_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        min_x, max_x, min_y, max_y = layer.GetExtent()
+        layer_srs = layer.GetSpatialRef()
+        if layer_srs is not None and not layer_srs.IsSame(raster_srs):
+            layer_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+            transform = osr.CoordinateTransformation(layer_srs, raster_srs)
+            min_x, min_y, max_x, max_y = transform.TransformBounds(min_x, min_y, max_x, max_y, 21)
+
+        # Snap the extent outwards to whole source pixels, clamped to the raster
+        gt = proc_ds.GetGeoTransform()
+        col0 = max(0, int(np.floor((min_x - gt[0]) / gt[1])))
+        col1 = min(proc_ds.RasterXSize, int(np.ceil((max_x - gt[0]) / gt[1])))
+        row0 = max(0, int(np.floor((max_y - gt[3]) / gt[5])))
+        row1 = min(proc_ds.RasterYSize, int(np.ceil((min_y - gt[3]) / gt[5])))
+        if col1 <= col0 or row1 <= row0:
+            raise RuntimeError(f"Clipping geometry does not overlap the requested bounds: {clipping_path}")
+
+        cropped_path = self._intermediate_path("cropped.vrt")
+        cropped_ds = gdal.Translate(cropped_path, proc_ds, format='VRT',
+                                    srcWin=[col0, row0, col1 - col0, row1 - row0])
+        cropped_ds.FlushCache()
+        self._cache_geo_meta(cropped_ds)
+
+        clip_mask_path = self._intermediate_path("clip_mask.tif")
+        clip_ds = self._create_raster(clip_mask_path, gdal.GDT_Byte)
+        gdal.RasterizeLayer(clip_ds, [1], layer, burn_values=[1], options=['ALL_TOUCHED=TRUE'])
+        clip_ds.FlushCache()
+        clip_ds = None
+        cutline_ds = None
+
+        return cropped_ds, cropped_path, clip_mask_path
+
+    def _cache_geo_meta(self, ds):
+        """Caches georeferencing of the export source so later steps skip re-querying it."""
+        self._geo_meta = {
+            'xsize': ds.RasterXSize,
+            'ysize': ds.RasterYSize,
+            'geotransform': ds.GetGeoTransform(),
+            'projection': ds.GetProjection(),
+        }
+
+    def _absolute_path(self, path):
+        return path if path.startswith('/vsimem/') else os.path.abspath(path)
+
+    def _write_vrt(self, vrt_path, vrt_content):
+        if vrt_path.startswith('/vsimem/'):
+            gdal.FileFromMemBuffer(vrt_path, vrt_content)
+        else:
+            with open(vrt_path, "w") as f:
+                f.write(vrt_content)
+
+    def _iter_blocks(self, band, min_size=BLOCK_SIZE):
+        """
+        Yields (xoff, yoff, xsize, ysize) windows aligned to the band's native block size.
+        Tiny native blocks (e.g. single-row strips) are grouped up to at least min_size pixels.
+        """
+        block_x, block_y = band.GetBlockSize()
+        step_x = block_x * max(1, min_size // block_x)
+        step_y = block_y * max(1, min_size // block_y)
+        for yoff in range(0, band.YSize, step_y):
+            ysize = min(step_y, band.YSize - yoff)
+            for xoff in range(0, band.XSize, step_x):
+                yield xoff, yoff, min(step_x, band.XSize - xoff), ysize
+
+    def _create_raster(self, path, dtype=gdal.GDT_Float32, nodata=None):
+        """Creates an empty single-band GeoTIFF matching self._geo_meta, ready for block writes."""
+        options = ['TILED=YES', f'BLOCKXSIZE={self.BLOCK_SIZE}', f'BLOCKYSIZE={self.BLOCK_SIZE}',
+                   'COMPRESS=DEFLATE', 'NUM_THREADS=ALL_CPUS', 'BIGTIFF=IF_SAFER']
+        if dtype == gdal.GDT_Byte:
+            # Binary masks are mostly empty: no predictor, and all-zero blocks need not be stored
+            options += ['PREDICTOR=1', 'SPARSE_OK=TRUE']
+        else:
+            options += ['PREDICTOR=3']
+
         driver = gdal.GetDriverByName("GTiff")
-        out_ds = driver.Create(path, source_ds.RasterXSize, source_ds.RasterYSize, 1, gdal.GDT_Float32)
-        out_ds.SetProjection(source_ds.GetProjection())
-        out_ds.SetGeoTransform(source_ds.GetGeoTransform())
+        meta = self._geo_meta
+        out_ds = driver.Create(path, meta['xsize'], meta['ysize'], 1, dtype, options=options)
+        out_ds.SetProjection(meta['projection'])
+        out_ds.SetGeoTransform(meta['geotransform'])
         
-        band = out_ds.GetRasterBand(1)
         if nodata is not None:
-            band.SetNoDataValue(nodata)
-            
-        band.WriteArray(data)
+            out_ds.GetRasterBand(1).SetNoDataValue(nodata)
+        return out_ds
+
+    def _polygonize_strip(self, raster_path, xsize, yoff, ysize):
+        """
+        Polygonizes one horizontal strip of raster_path in pixel space, returning (dn, wkb) pairs.
+        Vertices are whole-pixel offsets into the full raster, so edges shared across a seam are
+        bit-identical in both strips whatever the resolution or origin.
+        """
+        # Each worker opens its own handle: GDAL datasets must not be shared across threads
+        strip_ds = gdal.Translate('', raster_path, format='VRT', srcWin=[0, yoff, xsize, ysize])
+        strip_ds.SetGeoTransform([0, 1, 0, yoff, 0, 1])
+        band = strip_ds.GetRasterBand(1)
+
+        mem_ds = ogr.GetDriverByName("Memory").CreateDataSource('')
+        mem_layer = mem_ds.CreateLayer("strip", None, ogr.wkbPolygon)
+        mem_layer.CreateField(ogr.FieldDefn("dn", ogr.OFTInteger))
+        # The Byte threshold mask is its own mask (non-zero pixels), so no separate mask band is
+        # read. Continuous rasters exclude nodata instead.
+        mask_band = band if band.DataType == gdal.GDT_Byte else band.GetMaskBand()
+        gdal.Polygonize(band, mask_band, mem_layer, 0, [])
+
+        return [(feat.GetField(0), feat.GetGeometryRef().ExportToWkb()) for feat in mem_layer]
+
+    def _parallel_polygonize(self, raster_ds, layer, strip_rows=None):
+        """
+        Polygonizes raster_ds in horizontal strips (multiples of its block height) on a thread pool.
+        Polygons that touch across a strip seam are dissolved group by group so shapes crossing
+        strips are rejoined; everything is mapped onto the real geotransform only at the end.
+        """
+        xsize, ysize = self._geo_meta['xsize'], self._geo_meta['ysize']
+        # Workers reopen the source by path; the caller's handle only supplies its block height
+        raster_path = raster_ds.GetDescription()
+        block_y = raster_ds.GetRasterBand(1).GetBlockSize()[1]
+
+        workers = os.cpu_count() or 1
+        if strip_rows is None:
+            # Twice as many strips as workers evens out uneven mask density
+            strip_rows = -(-ysize // (workers * 2))
+            strip_rows = max(block_y, -(-strip_rows // block_y) * block_y)
+        strips = [(yoff, min(strip_rows, ysize - yoff)) for yoff in range(0, ysize, strip_rows)]
+        seam_rows = {yoff for yoff, _ in strips[1:]}
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Every submitted future, so queued work can be cancelled on failure or Ctrl+C
+            futures = []
+            try:
+                seam_polygons = []
+                futures += [executor.submit(self._polygonize_strip, raster_path, xsize, yoff, rows) for yoff, rows in strips]
+                for done, future in enumerate(as_completed(futures), 1):
+                    for dn, wkb in future.result():
+                        geom = ogr.CreateGeometryFromWkb(wkb)
+                        min_y, max_y = geom.GetEnvelope()[2:]
+                        # Pixel-space envelopes are whole numbers, so seam contact is an exact test
+                        if min_y in seam_rows or max_y in seam_rows:
+                            seam_polygons.append((dn, geom))
+                        else:
+                            self._write_polygon(layer, dn, geom)
+                    self.log(f"Polygonize Progress: {done}/{len(strips)} strips")
+
+                # Rejoin shapes split across strips: each touching group is unioned on its own, in parallel
+                groups = self._group_across_seams(seam_polygons, seam_rows)
+                unions = [executor.submit(self._dissolve_group, [seam_polygons[i][1] for i in group])
+                          for group in groups if len(group) > 1]
+                futures += unions
+                for group in groups:
+                    if len(group) == 1:
+                        self._write_polygon(layer, *seam_polygons[group[0]])
+                for group, future in zip([g for g in groups if len(g) > 1], unions):
+                    dn = seam_polygons[group[0]][0]
+                    for part in future.result():
+                        self._write_polygon(layer, dn, part)
+            except BaseException:
+                # Leaving the with-block waits only for strips already running, not queued ones
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _group_across_seams(self, seam_polygons, seam_rows):
+        """Groups indexes of seam_polygons with the same dn that touch across a seam (union-find)."""
+        parent = list(range(len(seam_polygons)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        # (dn, seam row) -> polygons ending on the seam from above, and starting on it from below
+        sides = {}
+        for i, (dn, geom) in enumerate(seam_polygons):
+            min_x, max_x, min_y, max_y = geom.GetEnvelope()
+            if max_y in seam_rows:
+                sides.setdefault((dn, max_y), ([], []))[0].append((min_x, max_x, i))
+            if min_y in seam_rows:
+                sides.setdefault((dn, min_y), ([], []))[1].append((min_x, max_x, i))
+
+        for above, below in sides.values():
+            below.sort()
+            for a_min, a_max, i in above:
+                for b_min, b_max, j in below:
+                    if b_min > a_max:
+                        break
+                    if b_max >= a_min and seam_polygons[i][1].Intersects(seam_polygons[j][1]):
+                        parent[find(i)] = find(j)
+
+        groups = {}
+        for i in range(len(seam_polygons)):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    def _dissolve_group(self, geoms):
+        """Unions one group of touching polygons, returning the resulting polygon parts."""
+        parts = ogr.Geometry(ogr.wkbMultiPolygon)
+        for geom in geoms:
+            parts.AddGeometry(geom)
+        merged = parts.UnionCascaded()
+        if merged.GetGeometryType() == ogr.wkbPolygon:
+            return [merged]
+        return [merged.GetGeometryRef(i).Clone() for i in range(merged.GetGeometryCount())]
+
+    def _write_polygon(self, layer, dn, geom):
+        """Maps a pixel-space polygon onto the export geotransform and writes it to layer."""
+        gt = self._geo_meta['geotransform']
+        for r in range(geom.GetGeometryCount()):
+            ring = geom.GetGeometryRef(r)
+            for i in range(ring.GetPointCount()):
+                px, py = ring.GetX(i), ring.GetY(i)
+                ring.SetPoint_2D(i, gt[0] + px * gt[1] + py * gt[2], gt[3] + px * gt[4] + py * gt[5])
+
+        feat = ogr.Feature(layer.GetLayerDefn())
+        feat.SetField("dn", dn)
+        feat.SetGeometry(geom)
+        layer.CreateFeature(feat)
+
+    def _save_as_raster(self, src_ds, output_path, dtype, nodata, skip_empty=False):
+        """
+        Copies src_ds block by block into a new GeoTIFF and returns it. With skip_empty, all-zero
+        blocks are never written; the sparse Byte GeoTIFF reads them back as 0.
+        """
+        out_ds = self._create_raster(output_path, dtype, nodata=nodata)
+        out_band = out_ds.GetRasterBand(1)
+        src_band = src_ds.GetRasterBand(1)
+
+        for xoff, yoff, xsize, ysize in self._iter_blocks(src_band):
+            # GDAL converts to the output type while reading, avoiding an extra astype() copy
+            data = src_band.ReadAsArray(xoff, yoff, xsize, ysize, buf_type=dtype)
+            if skip_empty and not data.any():
+                continue
+            out_band.WriteArray(data, xoff, yoff)
+
         out_ds.FlushCache()
-        out_ds = None
+        return out_ds
 
-    def _save_as_vector(self, data, source_ds, output_path):
-        """Converts binary raster data to a GeoPackage multipolygon."""
+    def _save_as_vector(self, raster_ds, output_path):
+        """Converts a raster (normally the threshold mask) to a GeoPackage multipolygon."""
         
-        # Save binary data to a temporary memory raster first
-        mem_driver = gdal.GetDriverByName('MEM')
-        tmp_ds = mem_driver.Create('', source_ds.RasterXSize, source_ds.RasterYSize, 1, gdal.GDT_Byte)
-        tmp_ds.SetProjection(source_ds.GetProjection())
-        tmp_ds.SetGeoTransform(source_ds.GetGeoTransform())
-        band = tmp_ds.GetRasterBand(1)
-        band.WriteArray(data)
-        band.SetNoDataValue(0)
-
         # Create the GPKG
         vec_driver = ogr.GetDriverByName("GPKG")
         if os.path.exists(output_path):
@@ -171,23 +580,24 @@ class OpenDEM:
             
         out_datasource = vec_driver.CreateDataSource(output_path)
         srs = ogr.osr.SpatialReference()
-        srs.ImportFromWkt(source_ds.GetProjection())
+        srs.ImportFromWkt(self._geo_meta['projection'])
         
-        layer = out_datasource.CreateLayer("mask", srs, ogr.wkbPolygon)
+        # Spatial index is built once after the bulk insert rather than per feature
+        layer = out_datasource.CreateLayer("mask", srs, ogr.wkbPolygon, options=['SPATIAL_INDEX=NO'])
         fd = ogr.FieldDefn("dn", ogr.OFTInteger) # dn=1 for the mask area
         layer.CreateField(fd)
 
         # Polygonize: Only pixels with value 1 are converted
-        gdal.Polygonize(band, band, layer, 0, [], callback=self.progress_callback)
-        
-        # # Final cleanup: Remove the features where DN=0 (if any created)
-        # layer.SetAttributeFilter("dn = 0")
-        # for feat in layer:
-        #     layer.DeleteFeature(feat.GetFID())
+        layer.StartTransaction()
+        self._parallel_polygonize(raster_ds, layer)
+        layer.CommitTransaction()
+
+        out_datasource.ReleaseResultSet(out_datasource.ExecuteSQL(
+            f"SELECT CreateSpatialIndex('{layer.GetName()}', '{layer.GetGeometryColumn()}')"))
             
         out_datasource = None
 
-    def _execute_process(self, dem_path):
+    def _execute_process(self, dem_ds):
         process_type = self.config.get('process')
         output_name = self.config.get('output')
         clipping_path = self._get_clipping_path()
@@ -195,50 +605,73 @@ class OpenDEM:
         nodata_val = -9999
 
         self.log(f"Running terrain analysis: '{process_type}'...")
-        temp_proc = os.path.join(self.cache_dir, "temp_proc.tif")
+        temp_proc = self._intermediate_path("temp_proc.tif")
         
         # 1. Process on the full rectangle for edge accuracy
-        gdal.DEMProcessing(temp_proc, dem_path, process_type)
+        # computeEdges fills the outer ring too, which a cutline does not necessarily crop away
+        proc_ds = gdal.DEMProcessing(temp_proc, dem_ds, process_type,
+                           creationOptions=['TILED=YES', 'BLOCKXSIZE=256', 'BLOCKYSIZE=256',
+                                            'COMPRESS=LZW', 'NUM_THREADS=ALL_CPUS'],
+                           computeEdges=True)
+        # Other handles (crop and export VRTs) read temp_proc by path
+        proc_ds.FlushCache()
 
         # 2. Apply clipping
+        clip_mask_path = None
         if clipping_path:
             self.log(f"Applying final cutline: {clipping_path}")
-            process_source = os.path.join(self.cache_dir, "final_clipped.tif")
-            gdal.Warp(process_source, temp_proc, cutlineDSName=clipping_path, 
-                      cropToCutline=True, dstNodata=nodata_val)
+            # Rasterize the cutline once; it is applied per block during export
+            ds_proc, process_path, clip_mask_path = self._rasterize_cutline(proc_ds, clipping_path)
         else:
-            process_source = temp_proc
-
-        ds_proc = gdal.Open(process_source)
-        data = ds_proc.GetRasterBand(1).ReadAsArray().astype(float)
+            process_path = temp_proc
+            ds_proc = proc_ds
+            self._cache_geo_meta(ds_proc)
 
         # 3. Decision Logic: Continuous vs Binary
         if mask_cfg:
             self.log(f"Mask detected. Generating binary output (Thresholds: {mask_cfg})")
-            # Create a boolean mask based on thresholds
-            condition = np.ones(data.shape, dtype=bool)
-            if 'min' in mask_cfg:
-                condition &= (data >= mask_cfg['min'])
-            if 'max' in mask_cfg:
-                condition &= (data <= mask_cfg['max'])
-            
-            # Convert to Binary (1 for True, 0 for False/NoData)
-            final_data = np.where(condition & (data != nodata_val), 1, 0).astype(np.uint8)
+            # Binary 1/0 band computed on the fly from the processed raster
+            arguments = {key: float(mask_cfg[key]) for key in ('min', 'max') if key in mask_cfg}
+            arguments['nodata'] = float(nodata_val)
+            sources = [process_path] + ([clip_mask_path] if clip_mask_path else [])
+            export_path = self._generate_derived_vrt("mask.vrt", sources, "Byte",
+                                                     "_threshold_pixel_function", arguments, 0)
+            export_ds = None
+            dtype = gdal.GDT_Byte
             current_nodata = 0 
         else:
             self.log("No mask detected. Generating continuous float output.")
-            final_data = data
+            if clip_mask_path:
+                export_path = self._generate_derived_vrt("clipped.vrt", [process_path, clip_mask_path], "Float32",
+                                                         "_clip_pixel_function", {'nodata': float(nodata_val)}, nodata_val)
+                export_ds = None
+            else:
+                export_path = process_path
+                export_ds = ds_proc
+            dtype = gdal.GDT_Float32
             current_nodata = nodata_val
 
+        # Derived VRTs are opened once, here, and that handle is what both exports read through
+        derived = export_ds is None
+        if derived:
+            export_ds = gdal.Open(export_path)
+
         # 4. Decision Logic: GeoTIFF vs GPKG
         if output_name.lower().endswith('.gpkg'):
             self.log(f"Exporting to Vector format: {output_name}")
-            self._save_as_vector(final_data, ds_proc, output_name)
+            if derived:
+                # Run the Python pixel function once, block by block, into a native GTiff. Polygonize
+                # would otherwise evaluate it again for the mask band, holding the GIL in every worker
+                export_ds = self._save_as_raster(export_ds, self._intermediate_path("temp_export.tif"),
+                                                 dtype, current_nodata, skip_empty=bool(mask_cfg))
+            self._save_as_vector(export_ds, output_name)
         else:
             self.log(f"Exporting to Raster format: {output_name}")
-            # Use Byte for binary, Float32 for continuous
-            dtype = gdal.GDT_Byte if mask_cfg else gdal.GDT_Float32
-            self._save_raster(final_data, ds_proc, output_name, nodata=current_nodata, dtype=dtype)
+            self._save_as_raster(export_ds, output_name, dtype, current_nodata, skip_empty=bool(mask_cfg))
+
+        export_ds = None
+        ds_proc = None
+        proc_ds = None
 
         self.log(f"Process complete: {output_name}")
         
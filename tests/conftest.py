@@ -0,0 +1,30 @@
+import pytest
+
+try:
+    from osgeo import gdal
+    from opendem import core
+except ImportError:  # test modules skip themselves via importorskip
+    gdal = core = None
+
+
+@pytest.fixture
+def app(tmp_path):
+    """A bare OpenDEM: no config file and none of the process-wide GDAL settings from __init__."""
+    app = core.OpenDEM.__new__(core.OpenDEM)
+    app.config = {}
+    app.cache_dir = str(tmp_path)
+    app.intermediates_in_memory = True
+    app._intermediates = []
+    app._geo_meta = None
+    yield app
+    app._cleanup_intermediates()
+
+
+@pytest.fixture
+def trusted_pixel_functions():
+    """Trusts opendem.core's VRT pixel functions, as OpenDEM.__init__ does, for one test only."""
+    key = 'GDAL_VRT_PYTHON_TRUSTED_MODULES'
+    previous = gdal.GetConfigOption(key)
+    gdal.SetConfigOption(key, core.__name__)
+    yield
+    gdal.SetConfigOption(key, previous)
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gdal = pytest.importorskip("osgeo.gdal")
+from osgeo import osr
+
+NODATA = -9999
+
+
+def test_rasterize_cutline_crops_and_masks_in_raster_srs(app, trusted_pixel_functions):
+    # 100 km square of 1 km pixels at the Web Mercator origin
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(3857)
+    proc_path = "/vsimem/test_clipping_proc.tif"
+    proc_ds = gdal.GetDriverByName("GTiff").Create(proc_path, 100, 100, 1, gdal.GDT_Float32)
+    proc_ds.SetGeoTransform([0, 1000, 0, 100000, 0, -1000])
+    proc_ds.SetProjection(srs.ExportToWkt())
+    data = (10 + np.arange(100 * 100).reshape(100, 100)).astype(np.float32)
+    proc_ds.GetRasterBand(1).WriteArray(data)
+    proc_ds.GetRasterBand(1).SetNoDataValue(NODATA)
+    proc_ds.FlushCache()
+
+    # Lower-left half of a 0.2-0.6 degree lon/lat square, in EPSG:4326
+    cutline_path = "/vsimem/test_clipping_cutline.geojson"
+    gdal.FileFromMemBuffer(cutline_path, json.dumps({
+        "type": "FeatureCollection",
+        "features": [{"type": "Feature", "properties": {}, "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[0.2, 0.2], [0.6, 0.2], [0.2, 0.6], [0.2, 0.2]]],
+        }}],
+    }))
+
+    cropped_ds, cropped_path, clip_mask_path = app._rasterize_cutline(proc_ds, cutline_path)
+
+    # 0.2 deg -> 22263.9 m (x) / 22263.9 m (y); 0.6 deg -> 66791.7 m (x) / 66792.9 m (y),
+    # snapped outwards to whole 1 km pixels
+    assert (cropped_ds.RasterXSize, cropped_ds.RasterYSize) == (45, 45)
+    assert cropped_ds.GetGeoTransform() == pytest.approx((22000, 1000, 0, 67000, 0, -1000))
+    np.testing.assert_array_equal(cropped_ds.ReadAsArray(), data[33:78, 22:67])
+
+    clipped_path = app._generate_derived_vrt("clipped.vrt", [cropped_path, clip_mask_path], "Float32",
+                                             "_clip_pixel_function", {'nodata': float(NODATA)}, NODATA)
+    mask_path = app._generate_derived_vrt("mask.vrt", [cropped_path, clip_mask_path], "Byte",
+                                          "_threshold_pixel_function", {'min': 5.0, 'nodata': float(NODATA)}, 0)
+    clip = gdal.Open(clip_mask_path).ReadAsArray()
+    clipped = gdal.Open(clipped_path).ReadAsArray()
+    mask = gdal.Open(mask_path).ReadAsArray()
+
+    # Top-right corner is beyond the hypotenuse; bottom-left and interior pixels are inside
+    assert clip[0, 44] == 0 and clip[44, 0] == 1 and clip[30, 10] == 1
+    assert clipped[0, 44] == NODATA and mask[0, 44] == 0
+    assert clipped[30, 10] == data[33 + 30, 22 + 10] and mask[30, 10] == 1
+
+    outside = clip == 0
+    assert outside.any() and not outside.all()
+    assert (clipped[outside] == NODATA).all()
+    assert (mask[outside] == 0).all()
+    np.testing.assert_array_equal(clipped[~outside], data[33:78, 22:67][~outside])
+    assert (mask[~outside] == 1).all()
+
+    cropped_ds = proc_ds = None
+    gdal.Unlink(proc_path)
+    gdal.Unlink(cutline_path)
@@ -0,0 +1,31 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+gdal = pytest.importorskip("osgeo.gdal")
+
+
+def test_elevation_vrt_decodes_terrarium_exactly(app):
+    rgb = np.array([
+        [[0, 255, 128, 1]],     # red
+        [[0, 255, 0, 134]],     # green
+        [[0, 255, 1, 77]],      # blue
+    ], dtype=np.uint8)
+
+    path = "/vsimem/test_elevation_rgb.tif"
+    ds = gdal.GetDriverByName("GTiff").Create(path, 4, 1, 3, gdal.GDT_Byte)
+    ds.SetGeoTransform([0, 10, 0, 0, 0, -10])
+    ds.WriteArray(rgb)
+    ds.FlushCache()
+
+    vrt_path = app._generate_elevation_vrt(ds, path)
+    elevation = gdal.Open(vrt_path).ReadAsArray()
+
+    r, g, b = (rgb[i].astype(np.float64) for i in range(3))
+    expected = (r * 256 + g + b / 256 - 32768).astype(np.float32)
+    assert elevation.dtype == np.float32
+    np.testing.assert_array_equal(elevation, expected)
+    assert elevation[0, 0] == -32768.0
+    assert elevation[0, 1] == np.float32(255 * 256 + 255 + 255 / 256 - 32768)
+
+    ds = None
+    gdal.Unlink(path)
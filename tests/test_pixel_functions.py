@@ -0,0 +1,60 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+gdal = pytest.importorskip("osgeo.gdal")
+from osgeo import osr
+
+from opendem.core import _threshold_mask
+
+NODATA = -9999
+
+
+def _write_raster(path, data, dtype, nodata=None):
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(3857)
+    ysize, xsize = data.shape
+    ds = gdal.GetDriverByName("GTiff").Create(path, xsize, ysize, 1, dtype)
+    ds.SetGeoTransform([500000.0, 30, 0, 6000000.0, 0, -30])
+    ds.SetProjection(srs.ExportToWkt())
+    band = ds.GetRasterBand(1)
+    band.WriteArray(data)
+    if nodata is not None:
+        band.SetNoDataValue(nodata)
+    ds.FlushCache()
+    return ds
+
+
+def test_derived_vrts_match_numpy_reference(app, trusted_pixel_functions):
+    rng = np.random.default_rng(0)
+    data = rng.uniform(-10, 10, size=(37, 53)).astype(np.float32)
+    data[::7, ::5] = NODATA
+    data[0, :4] = [-2.5, 4.0, np.nextafter(np.float32(-2.5), np.float32(-3)), 4.25]  # threshold edges
+    clip = np.zeros(data.shape, dtype=np.uint8)
+    clip[5:30, 10:45] = 1
+
+    data_path = "/vsimem/test_pixel_functions_data.tif"
+    clip_path = "/vsimem/test_pixel_functions_clip.tif"
+    data_ds = _write_raster(data_path, data, gdal.GDT_Float32, NODATA)
+    clip_ds = _write_raster(clip_path, clip, gdal.GDT_Byte)
+    app._cache_geo_meta(data_ds)
+
+    mask_cfg = {'min': -2.5, 'max': 4.0}
+    arguments = dict(mask_cfg, nodata=float(NODATA))
+
+    mask_path = app._generate_derived_vrt("mask.vrt", [data_path], "Byte",
+                                          "_threshold_pixel_function", arguments, 0)
+    expected_mask = _threshold_mask(data, mask_cfg, NODATA)
+    np.testing.assert_array_equal(gdal.Open(mask_path).ReadAsArray(), expected_mask)
+
+    clipped_mask_path = app._generate_derived_vrt("clipped_mask.vrt", [data_path, clip_path], "Byte",
+                                                  "_threshold_pixel_function", arguments, 0)
+    np.testing.assert_array_equal(gdal.Open(clipped_mask_path).ReadAsArray(), expected_mask * clip)
+
+    clipped_path = app._generate_derived_vrt("clipped.vrt", [data_path, clip_path], "Float32",
+                                             "_clip_pixel_function", {'nodata': float(NODATA)}, NODATA)
+    np.testing.assert_array_equal(gdal.Open(clipped_path).ReadAsArray(),
+                                  np.where(clip == 0, np.float32(NODATA), data))
+
+    data_ds = clip_ds = None
+    gdal.Unlink(data_path)
+    gdal.Unlink(clip_path)
@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+gdal = pytest.importorskip("osgeo.gdal")
+from osgeo import ogr
+
+
+def _mask_layer():
+    ds = ogr.GetDriverByName("Memory").CreateDataSource('')
+    layer = ds.CreateLayer("mask", None, ogr.wkbPolygon)
+    layer.CreateField(ogr.FieldDefn("dn", ogr.OFTInteger))
+    return ds, layer
+
+
+def test_parallel_polygonize_rejoins_shapes_across_seams(app):
+    # Non-dyadic resolution, with the origin just above 2^23 m northing so the strips straddle it
+    path = "/vsimem/test_polygonize_mask.tif"
+    ds = gdal.GetDriverByName("GTiff").Create(path, 40, 30, 1, gdal.GDT_Byte)
+    ds.SetGeoTransform([1234567.1, 0.1, 0, 8388608.0 + 1.7, 0, -0.1])
+
+    data = np.zeros((30, 40), dtype=np.uint8)
+    data[3:27, 10:14] = 1   # vertical bar crossing both seams (rows 10 and 20)
+    data[8:23, 20:35] = 1   # block crossing both seams
+    data[12:18, 25:30] = 0  # with a hole inside the middle strip
+    data[2:6, 30:36] = 1    # shape entirely inside the first strip
+    band = ds.GetRasterBand(1)
+    band.WriteArray(data)
+    band.SetNoDataValue(0)
+    ds.FlushCache()
+
+    expected_ds, expected = _mask_layer()
+    gdal.Polygonize(band, band, expected, 0, [])
+
+    app._cache_geo_meta(ds)
+    actual_ds, actual = _mask_layer()
+    app._parallel_polygonize(ds, actual, strip_rows=10)
+
+    assert actual.GetFeatureCount() == expected.GetFeatureCount() == 3
+    expected_area = sum(feat.GetGeometryRef().GetArea() for feat in expected)
+    actual_area = sum(feat.GetGeometryRef().GetArea() for feat in actual)
+    assert actual_area == pytest.approx(expected_area)
+
+    ds = None
+    gdal.Unlink(path)
@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+gdal = pytest.importorskip("osgeo.gdal")
+from osgeo import ogr, osr
+
+
+def test_save_as_vector_writes_polygons_with_spatial_index(app, tmp_path):
+    path = "/vsimem/test_vector_mask.tif"
+    ds = gdal.GetDriverByName("GTiff").Create(path, 20, 20, 1, gdal.GDT_Byte)
+    ds.SetGeoTransform([100000.0, 10, 0, 200000.0, 0, -10])
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(3857)
+    ds.SetProjection(srs.ExportToWkt())
+    data = np.zeros((20, 20), dtype=np.uint8)
+    data[2:8, 2:8] = 1
+    data[12:18, 10:19] = 1
+    band = ds.GetRasterBand(1)
+    band.WriteArray(data)
+    band.SetNoDataValue(0)
+    ds.FlushCache()
+
+    app._cache_geo_meta(ds)
+    output_path = str(tmp_path / "mask.gpkg")
+    app._save_as_vector(ds, output_path)
+
+    out = ogr.Open(output_path)
+    layer = out.GetLayer(0)
+    assert layer.GetFeatureCount() == 2
+    assert sum(feat.GetGeometryRef().GetArea() for feat in layer) == pytest.approx((36 + 54) * 100)
+
+    result = out.ExecuteSQL(
+        f"SELECT HasSpatialIndex('{layer.GetName()}', '{layer.GetGeometryColumn()}')")
+    assert result.GetNextFeature().GetField(0) == 1
+    out.ReleaseResultSet(result)
+
+    ds = None
+    gdal.Unlink(path)